@@ -1,56 +1,334 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import sqlite3
-from datetime import datetime
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from io import BytesIO
+from datetime import datetime, time, timezone
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Advanced Wealth Manager", page_icon="💰", layout="wide")
+logger = logging.getLogger(__name__)
+LOG_PAGE_SIZE = 500 # Rows per page in the Transaction Log
+CSV_CHUNK_SIZE = 10000 # Rows written per chunk when building the CSV export
+OPTIMIZE_EVERY_N_ROWS = 100 # Refresh SQLite's query planner stats after this many rows are written
 
 # --- DATABASE FUNCTIONS ---
+def open_connection():
+    # Autocommit mode, so we decide where transactions start and end
+    conn = sqlite3.connect('finance.db', check_same_thread=False, isolation_level=None)
+    # These pragmas are per-connection, so every connect needs them
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+@st.cache_resource
+def get_connection():
+    # One shared read connection per process instead of reopening the file on every rerun
+    return open_connection()
+
+@st.cache_resource
+def get_write_connection():
+    # SQLite only has one writer at a time anyway, so every write goes through one long-lived
+    # connection. The lock stops two sessions from opening a transaction on it at once.
+    # The counter lives here too (process-wide, guarded by the same lock) because the planner
+    # stats it maintains belong to the database, not to any one browser session.
+    conn = open_connection()
+    lock = threading.Lock()
+    write_stats = {'rows_since_optimize': 0}
+
+    # Keep the planner stats fresh for the next start, so the date range queries stay on the index
+    def optimize_on_exit():
+        with lock:
+            conn.execute("PRAGMA optimize")
+    atexit.register(optimize_on_exit)
+    return conn, lock, write_stats
+
+@contextmanager
+def write_transaction():
+    conn, lock, write_stats = get_write_connection()
+    with lock:
+        changes_before = conn.total_changes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            # Also covers a failed COMMIT (busy, disk error), so the shared connection
+            # is never left stuck inside an open transaction
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        # Every so often let SQLite re-analyze tables whose row counts have shifted.
+        # total_changes counts rows, so a 10k row import counts as 10k, not as one write.
+        write_stats['rows_since_optimize'] += conn.total_changes - changes_before
+        if write_stats['rows_since_optimize'] >= OPTIMIZE_EVERY_N_ROWS:
+            # Best effort: the write is already committed, so a failed optimize (e.g. database
+            # is locked) must not surface as a failed write. Reset either way so we don't retry
+            # on every following write.
+            write_stats['rows_since_optimize'] = 0
+            try:
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                logger.warning("PRAGMA optimize failed after a write, skipping it", exc_info=True)
+
+# Dates are stored as unix seconds at midnight UTC. UTC (not local time) so the
+# day never shifts when Pandas reads the numbers back with unit='s'.
+def to_epoch(d):
+    return int(datetime.combine(d, time(), tzinfo=timezone.utc).timestamp())
+
+def from_epoch(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).date()
+
+@st.cache_resource
 def init_db():
-    conn = sqlite3.connect('finance.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            type TEXT,
-            category TEXT,
-            amount REAL,
-            notes TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    # Runs once per process (cache_resource), not on every rerun.
+    # Schema changes are writes too, so they go through the write connection under its lock
+    conn, lock, _ = get_write_connection()
+    with lock:
+        c = conn.cursor()
+        # WAL lets reads run alongside the writer (and it sticks to the db file)
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date INTEGER NOT NULL,
+                type TEXT,
+                category TEXT,
+                amount REAL,
+                notes TEXT
+            )
+        ''')
+        # Older databases kept the date as 'YYYY-MM-DD' text, convert them once
+        date_type = next(col[2] for col in c.execute("PRAGMA table_info(transactions)") if col[1] == 'date')
+        if date_type.upper() == 'TEXT':
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                c.execute('''
+                    CREATE TABLE transactions_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date INTEGER NOT NULL,
+                        type TEXT,
+                        category TEXT,
+                        amount REAL,
+                        notes TEXT
+                    )
+                ''')
+                # 'start of day' drops any time of day, so migrated rows land on midnight UTC like new ones
+                c.execute('''
+                    INSERT INTO transactions_new (id, date, type, category, amount, notes)
+                    SELECT id, CAST(strftime('%s', date, 'start of day') AS INTEGER), type, category, amount, notes
+                    FROM transactions WHERE strftime('%s', date, 'start of day') IS NOT NULL
+                ''')
+                # Rows with a missing or unreadable date can't go in the new table, so they are
+                # set aside untouched in transactions_invalid_date instead of being thrown away
+                c.execute('''
+                    CREATE TABLE IF NOT EXISTS transactions_invalid_date (
+                        id INTEGER PRIMARY KEY,
+                        date TEXT,
+                        type TEXT,
+                        category TEXT,
+                        amount REAL,
+                        notes TEXT
+                    )
+                ''')
+                c.execute('''
+                    INSERT INTO transactions_invalid_date (id, date, type, category, amount, notes)
+                    SELECT id, date, type, category, amount, notes
+                    FROM transactions WHERE strftime('%s', date, 'start of day') IS NULL
+                ''')
+                # Dropping the old table loses its AUTOINCREMENT counter, carry it over so
+                # the ids of deleted (or set aside) rows are never handed out again
+                old_seq = c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'").fetchone()
+                c.execute("DROP TABLE transactions")
+                c.execute("ALTER TABLE transactions_new RENAME TO transactions")
+                if old_seq is not None:
+                    c.execute("DELETE FROM sqlite_sequence WHERE name = 'transactions'")
+                    c.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('transactions', ?)", old_seq)
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
+        # Set-aside rows whose date has since been fixed by hand go back into transactions.
+        # Their ids are still reserved (see the sqlite_sequence carry-over), so they can't clash.
+        if c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_invalid_date'").fetchone():
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                restored_rows = c.execute('''
+                    INSERT INTO transactions (id, date, type, category, amount, notes)
+                    SELECT id, CAST(strftime('%s', date, 'start of day') AS INTEGER), type, category, amount, notes
+                    FROM transactions_invalid_date WHERE strftime('%s', date, 'start of day') IS NOT NULL
+                ''').rowcount
+                c.execute("DELETE FROM transactions_invalid_date WHERE strftime('%s', date, 'start of day') IS NOT NULL")
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
+            invalid_date_rows = c.execute("SELECT COUNT(*) FROM transactions_invalid_date").fetchone()[0]
+            # Logged once per process start rather than shown to every session on every rerun
+            if restored_rows:
+                logger.info("Restored %d transaction(s) from transactions_invalid_date", restored_rows)
+            if invalid_date_rows:
+                logger.warning("%d transaction(s) have a missing or unreadable date and are left out of the app. "
+                               "They are kept in the transactions_invalid_date table of finance.db: set their "
+                               "date to 'YYYY-MM-DD' there and restart the app to restore them.", invalid_date_rows)
+        # Indexes so the date range filters are B-tree seeks instead of full scans
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tx_date ON transactions(date)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tx_type_date ON transactions(type, date)")
+        c.execute("PRAGMA optimize")
+    return True
 
 def add_transaction(date, type, category, amount, notes):
-    conn = sqlite3.connect('finance.db')
-    c = conn.cursor()
-    c.execute('INSERT INTO transactions (date, type, category, amount, notes) VALUES (?, ?, ?, ?, ?)', 
-              (date, type, category, amount, notes))
-    conn.commit()
-    conn.close()
+    add_transactions([(date, type, category, amount, notes)])
+
+def add_transactions(rows):
+    # rows: (date, type, category, amount, notes) tuples, all inserted in one transaction
+    with write_transaction() as conn:
+        conn.executemany('INSERT INTO transactions (date, type, category, amount, notes) VALUES (?, ?, ?, ?, ?)',
+                         [(to_epoch(date), type, category, amount, notes) for date, type, category, amount, notes in rows])
 
 def delete_transaction(transaction_id):
-    conn = sqlite3.connect('finance.db')
-    c = conn.cursor()
-    c.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
-    conn.commit()
-    conn.close()
-
-def get_transactions():
-    conn = sqlite3.connect('finance.db')
-    df = pd.read_sql_query("SELECT * FROM transactions", conn)
-    conn.close()
+    with write_transaction() as conn:
+        conn.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
+
+# --- QUERIES ---
+# All cached until a write calls st.cache_data.clear()
+# Date bounds are converted to epoch seconds so SQLite compares plain integers on the index
+
+@st.cache_data(ttl=None)
+def get_date_bounds():
+    c = get_connection().cursor()
+    min_date, max_date = c.execute("SELECT MIN(date), MAX(date) FROM transactions").fetchone()
+    if min_date is None:
+        return None, None
+    return from_epoch(min_date), from_epoch(max_date)
+
+@st.cache_data(ttl=None)
+def get_transactions(start_date=None, end_date=None, limit=None, offset=0):
+    query = "SELECT id, date, type, category, amount, notes FROM transactions"
+    params = ()
+    if start_date is not None:
+        query += " WHERE date BETWEEN ? AND ?"
+        params = (to_epoch(start_date), to_epoch(end_date))
+    # Walks idx_tx_date backwards, so there is no sort step and LIMIT stops the scan early
+    query += " ORDER BY date DESC, id DESC"
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += (limit, offset)
+    df = pd.read_sql_query(query, get_connection(), params=params)
+    # Signed int64 on purpose, the unit='s' conversion is much slower from unsigned types
+    df['date'] = pd.to_datetime(df['date'].to_numpy(dtype='int64'), unit='s')
+    # Only a handful of distinct values, so store them as small integer codes instead of Python strings
+    df['type'] = df['type'].astype('category')
+    df['category'] = df['category'].astype('category')
     return df
 
-# Initialize DB
+@st.cache_data(ttl=None)
+def get_totals(start_date, end_date):
+    # One pass over the range gives both the per-type sums and the row count.
+    # e.g. ({'Income': 500.0, 'Expense': 425.0}, 4), a type with no rows is simply missing
+    c = get_connection().cursor()
+    rows = c.execute(
+        "SELECT type, COUNT(*), SUM(amount) FROM transactions WHERE date BETWEEN ? AND ? GROUP BY type",
+        (to_epoch(start_date), to_epoch(end_date))).fetchall()
+    return {type: total for type, _, total in rows}, sum(count for _, count, _ in rows)
+
+@st.cache_data(ttl=None)
+def get_expense_by_category(start_date, end_date):
+    return pd.read_sql_query(
+        """SELECT category, SUM(amount) AS amount FROM transactions
+           WHERE type = 'Expense' AND date BETWEEN ? AND ?
+           GROUP BY category""",
+        get_connection(), params=(to_epoch(start_date), to_epoch(end_date)))
+
+# Bucket each date to the same label Pandas used: the day, the week-ending Sunday, or the month end.
+# Buckets stay epoch seconds so SQLite groups on integers and Pandas converts them with unit='s'.
+# Dates are midnight UTC, so the day number is date / 86400, and day 0 (Jan 1st 1970) was a Thursday.
+BUCKET_SQL = {
+    "Daily": "date",
+    "Weekly": "date + (6 - (date / 86400 + 3) % 7) * 86400",
+    "Monthly": "CAST(strftime('%s', date, 'unixepoch', 'start of month', '+1 month', '-1 day') AS INTEGER)",
+}
+
+@st.cache_data(ttl=None)
+def get_cash_flow(start_date, end_date, freq_choice):
+    bucket = BUCKET_SQL[freq_choice]
+    flow_df = pd.read_sql_query(
+        f"""SELECT {bucket} AS bucket, type, SUM(amount) AS amount FROM transactions
+            WHERE date BETWEEN ? AND ?
+            GROUP BY bucket, type ORDER BY bucket""",
+        get_connection(), params=(to_epoch(start_date), to_epoch(end_date)))
+    flow_df.insert(0, 'date', pd.to_datetime(flow_df.pop('bucket').to_numpy(dtype='int64'), unit='s'))
+    return flow_df
+
+@st.cache_data(ttl=None)
+def build_csv(start_date, end_date):
+    # Only runs when Download is clicked (see the download button, older Streamlit releases
+    # call it on every rerun instead), cached on the date range.
+    # Reads straight from SQLite rather than through get_transactions, so the full range never
+    # sits in the cache as a DataFrame, and SQLite writes the dates out as ISO text itself
+    # (the table-qualified transactions.date is the stored integer, not the ISO alias).
+    export_df = pd.read_sql_query(
+        """SELECT id, date(date, 'unixepoch') AS date, type, category, amount, notes FROM transactions
+           WHERE transactions.date BETWEEN ? AND ?
+           ORDER BY transactions.date DESC, id DESC""",
+        get_connection(), params=(to_epoch(start_date), to_epoch(end_date)))
+    # Written in chunks straight into a bytes buffer instead of one giant str that then gets encoded
+    buffer = BytesIO()
+    export_df.to_csv(buffer, index=False, encoding='utf-8', chunksize=CSV_CHUNK_SIZE)
+    return buffer.getvalue()
+
+# --- CHARTS ---
+# Figures are cached as plain dicts on the same keys as their data and rebuilt with go.Figure,
+# so reruns from unrelated widgets skip the Plotly Express work
+
+@st.cache_data(ttl=None)
+def build_expense_pie(start_date, end_date):
+    expense_by_cat = get_expense_by_category(start_date, end_date)
+    if expense_by_cat.empty:
+        return None
+    return px.pie(expense_by_cat, values="amount", names="category", hole=0.4).to_dict()
+
+@st.cache_data(ttl=None)
+def build_cash_flow_chart(start_date, end_date, freq_choice):
+    # SQLite buckets the dates and sums each (bucket, type) pair, see BUCKET_SQL
+    resampled_df = get_cash_flow(start_date, end_date, freq_choice)
+
+    # Map the user choice to Pandas frequency codes
+    # 'D' = Daily, 'W' = Weekly, 'ME' = Month End
+    freq_map = {"Daily": "D", "Weekly": "W", "Monthly": "ME"}
+    selected_freq = freq_map[freq_choice]
+
+    fig_bar = px.bar(
+        resampled_df, 
+        x="date", 
+        y="amount", 
+        color="type", 
+        color_discrete_map={"Income": "green", "Expense": "red"},
+        barmode='group',
+        title=f"Cash Flow ({freq_choice})"
+    )
+
+    # Make the X-axis smart (don't show every single date label if it's crowded)
+    fig_bar.update_xaxes(dtick=selected_freq) 
+    return fig_bar.to_dict()
+
+# Initialize DB (a no-op after the first run in this process)
 init_db()
 
 # --- ⚠️ CRITICAL FIX: LOAD DATA HERE (AT THE TOP) ---
 # We load the data NOW so it is available for the Sidebar AND the Dashboard
-df = get_transactions()
+min_date, max_date = get_date_bounds()
+# The delete dropdown only offers the 200 most recent entries
+df = get_transactions(limit=200)
 
 # --- SIDEBAR: ADD & DELETE ---
 st.sidebar.header("➕ Add Transaction")
@@ -68,6 +346,7 @@ tx_notes = st.sidebar.text_area("Notes (Optional)")
 
 if st.sidebar.button("Add Entry"):
     add_transaction(tx_date, tx_type, tx_category, tx_amount, tx_notes)
+    st.cache_data.clear()
     st.sidebar.success("Entry Added!")
     st.rerun()
 
@@ -76,9 +355,11 @@ st.sidebar.divider()
 # 2. Delete Entry Form
 st.sidebar.header("🗑️ Delete Transaction")
 if not df.empty:
-    # Create the lookup dictionary
-    transaction_options = {f"{row['id']}: {row['category']} - ₱{row['amount']} ({row['date']})": row['id'] for index, row in df.iterrows()}
-    
+    # Create the lookup dictionary, building the labels column-wise instead of row by row
+    labels = (df['id'].astype(str) + ": " + df['category'].astype(str) + " - ₱" + df['amount'].astype(str)
+              + " (" + df['date'].dt.strftime('%Y-%m-%d') + ")").to_numpy()
+    transaction_options = dict(zip(labels, df['id'].tolist())) # tolist() so sqlite3 gets plain ints
+
     # Selectbox to choose item
     selected_option = st.sidebar.selectbox("Select Entry to Remove", list(transaction_options.keys()))
     
@@ -87,6 +368,7 @@ if not df.empty:
     
     if st.sidebar.button("Delete Entry"):
         delete_transaction(selected_id)
+        st.cache_data.clear()
         st.sidebar.warning(f"Deleted Transaction ID: {selected_id}")
         st.rerun()
 else:
@@ -102,13 +384,6 @@ if not df.empty:
     st.sidebar.divider()
     st.sidebar.header("⏳ Time Filters")
     
-    # We convert the 'date' column to datetime objects immediately for filtering
-    df['date'] = pd.to_datetime(df['date'])
-    
-    # Get the earliest and latest dates in your data
-    min_date = df['date'].min()
-    max_date = df['date'].max()
-    
     # Create a slider or date input
     # default value is a tuple: (start_date, end_date)
     date_range = st.sidebar.date_input(
@@ -121,35 +396,36 @@ if not df.empty:
     # FILTER LOGIC: Only filter if the user selected two dates (Start & End)
     if len(date_range) == 2:
         start_date, end_date = date_range
-        # Convert inputs to datetime64[ns] to match Pandas format
-        start_date = pd.to_datetime(start_date)
-        end_date = pd.to_datetime(end_date)
-        
-        # The Mask: "Keep rows where date is >= Start AND date <= End"
-        mask = (df['date'] >= start_date) & (df['date'] <= end_date)
-        filtered_df = df.loc[mask]
     else:
-        filtered_df = df # Fallback if date selection is incomplete
-        
+        start_date, end_date = min_date, max_date # Fallback if date selection is incomplete
+
+    # One SUM ... GROUP BY type query instead of splitting the transactions into two frames
+    totals, tx_count = get_totals(start_date, end_date)
+
     # --- 0.5 EXPORT BUTTON (The "Backup") ---
-    # We create a CSV string from the filtered data
-    csv = filtered_df.to_csv(index=False).encode('utf-8')
-    st.sidebar.download_button(
-        "📥 Download CSV",
-        csv,
-        "finance_data.csv",
-        "text/csv",
-        key='download-csv'
-    )
+    # We create a CSV file from the filtered data, but only once the button is clicked.
+    # Older Streamlit releases reject a callable as data, so there we fall back to handing
+    # over the (cached) bytes up front.
+    try:
+        st.sidebar.download_button(
+            "📥 Download CSV",
+            lambda: build_csv(start_date, end_date),
+            "finance_data.csv",
+            "text/csv",
+            key='download-csv'
+        )
+    except StreamlitAPIException:
+        st.sidebar.download_button(
+            "📥 Download CSV",
+            build_csv(start_date, end_date),
+            "finance_data.csv",
+            "text/csv",
+            key='download-csv'
+        )
 
-    # --- FROM HERE ON, WE USE 'filtered_df' INSTEAD OF 'df' ---
-    
     # --- A. DATA PROCESSING ---
-    income_df = filtered_df[filtered_df['type'] == "Income"]
-    expense_df = filtered_df[filtered_df['type'] == "Expense"]
-    
-    total_income = income_df['amount'].sum()
-    total_expense = expense_df['amount'].sum()
+    total_income = totals.get("Income", 0.0)
+    total_expense = totals.get("Expense", 0.0)
     remaining_budget = total_income - total_expense
     
     # --- B. KPI CARDS ---
@@ -168,52 +444,25 @@ if not df.empty:
     
     with c1:
         st.subheader("Expense Breakdown")
-        if not expense_df.empty:
-            expense_by_cat = expense_df.groupby("category")["amount"].sum().reset_index()
-            fig_pie = px.pie(expense_by_cat, values="amount", names="category", hole=0.4)
-            st.plotly_chart(fig_pie, use_container_width=True)
+        fig_pie = build_expense_pie(start_date, end_date)
+        if fig_pie is not None:
+            st.plotly_chart(go.Figure(fig_pie), use_container_width=True)
         else:
             st.info("No expenses in this time range.")
 
     with c2:
         st.subheader("Cash Flow Trend")
         
-        if not filtered_df.empty:
+        if tx_count:
             # 1. THE VIEW SELECTOR
             # We add a radio button but display it horizontally to save space
             freq_choice = st.radio("View By:", ["Daily", "Weekly", "Monthly"], 
                                    horizontal=True, 
                                    label_visibility="collapsed") # Hides the label "View By"
             
-            # 2. RESAMPLING LOGIC (The Magic)
-            # Pandas needs a Datetime Index to resample time series
-            chart_df = filtered_df.copy()
-            chart_df = chart_df.set_index('date')
-            
-            # Map the user choice to Pandas frequency codes
-            # 'D' = Daily, 'W' = Weekly, 'ME' = Month End
-            freq_map = {"Daily": "D", "Weekly": "W", "Monthly": "ME"}
-            selected_freq = freq_map[freq_choice]
-            
-            # Group by Time AND Type (Income/Expense)
-            # .groupby([pd.Grouper(freq=selected_freq), 'type']) matches time buckets
-            resampled_df = chart_df.groupby([pd.Grouper(freq=selected_freq), 'type'])['amount'].sum().reset_index()
-            
-            # 3. THE CHART
-            fig_bar = px.bar(
-                resampled_df, 
-                x="date", 
-                y="amount", 
-                color="type", 
-                color_discrete_map={"Income": "green", "Expense": "red"},
-                barmode='group',
-                title=f"Cash Flow ({freq_choice})"
-            )
-            
-            # Make the X-axis smart (don't show every single date label if it's crowded)
-            fig_bar.update_xaxes(dtick=selected_freq) 
-            
-            st.plotly_chart(fig_bar, use_container_width=True)
+            # 2. THE CHART (resampled and drawn in build_cash_flow_chart)
+            fig_bar = build_cash_flow_chart(start_date, end_date, freq_choice)
+            st.plotly_chart(go.Figure(fig_bar), use_container_width=True)
         else:
             st.info("No data available.")
 
@@ -222,22 +471,27 @@ if not df.empty:
     # --- D. RECENT TRANSACTIONS TABLE ---
     st.subheader("📝 Transaction Log")
     
-    display_df = filtered_df[['id', 'date', 'type', 'category', 'amount', 'notes']].copy()
-    
-    # Sort so newest is on top
-    display_df = display_df.sort_values(by="date", ascending=False)
-    
-    # Create row numbers
-    display_df.reset_index(drop=True, inplace=True)
-    display_df.index = display_df.index + 1 
-    
-    # Format date for display
-    display_df['date'] = display_df['date'].dt.strftime('%B %d, %Y')
-    
+    # Only fetch the page being looked at, 500 rows at a time
+    page_count = max(1, -(-tx_count // LOG_PAGE_SIZE))
+    # Clamp first, a narrower date range can leave the saved page past the end
+    st.session_state['log_page'] = min(st.session_state.get('log_page', 1), page_count)
+    if page_count > 1:
+        st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key='log_page')
+    offset = (st.session_state['log_page'] - 1) * LOG_PAGE_SIZE
+
+    # Already sorted newest first by the query, and already just the columns we show
+    log_df = get_transactions(start_date, end_date, limit=LOG_PAGE_SIZE, offset=offset)
+
+    # Create row numbers, carrying on from the previous page (st.cache_data hands every
+    # run its own copy, so relabelling it in place is safe)
+    log_df.index = log_df.index + offset + 1
+
     st.dataframe(
-        display_df,
+        log_df,
         column_config={
             "id": None, 
+            # Formatted by the browser, so the column stays a real datetime (and sorts like one)
+            "date": st.column_config.DatetimeColumn("Date", format="MMMM DD, YYYY"),
             "amount": st.column_config.NumberColumn("Amount", format="₱%.2f"),
             "type": st.column_config.TextColumn("Type", width="small"),
             "notes": st.column_config.TextColumn("Notes", width="large"),